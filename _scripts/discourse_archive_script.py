@@ -6,18 +6,26 @@ TODO: figure out how to handle post updates.
 
 """
 import argparse
-import urllib.request
+import asyncio
 import sys
-import time
 import os
 import json
 import functools
+import sqlite3
+import time
 import datetime
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+import aiohttp
 import numpy as np
 from tqdm import tqdm
-import re
+
+try:
+    # If `orjson` is installed, use it for much faster JSON parsing.
+    import orjson
+except ImportError:
+    orjson = None
 
 import logging
 
@@ -43,6 +51,22 @@ parser.add_argument(
 parser.add_argument(
     '-t', '--target-dir', help='Target directory for the archive',
     default=Path(os.environ.get('TARGET_DIR', './archive')))
+parser.add_argument(
+    '--migrate-filenames', action='store_true',
+    help='One-time rename of existing posts to the filename scheme that '
+         'encodes the topic id')
+
+# Discourse rate limits aggressively; keep the number of in-flight requests
+# well below the connector's connection limit.
+CONCURRENT_REQUESTS = 10
+CONNECTION_LIMIT = 20
+
+# Number of `/posts.json?before=` windows to probe in parallel when scanning
+# for the next non-empty page of posts.
+PROBE_WINDOWS = 8
+
+# Number of `/raw/{id}?page=N` pages to speculatively fetch ahead per topic.
+PAGE_PREFETCH = 4
 
 
 @functools.cache
@@ -50,37 +74,142 @@ def args():
     return parser.parse_args()
 
 
-def http_get(path) -> str:
+def _json_dumps(obj) -> bytes:
+    """Serialize with orjson when available; it's several times faster and
+    emits bytes directly, skipping a separate encode."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+
+def _json_loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# How long cached responses stay fresh. Topics rarely change once rendered,
+# so an hour is plenty to make re-runs of renderFromJSONs near-free.
+CACHE_EXPIRE_AFTER = 3600
+
+
+@functools.cache
+def _response_cache() -> sqlite3.Connection:
+    """Open (and initialize) the on-disk response cache."""
+    cache_path = Path(args().target_dir) / 'discourse_cache.sqlite'
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(cache_path)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS http_cache ('
+        'path TEXT PRIMARY KEY, fetched_at REAL, body TEXT)')
+    return conn
+
+
+async def http_get_cached(session: aiohttp.ClientSession, path: str) -> str:
+    """`http_get`, backed by a persistent per-URL disk cache.
+
+    Re-runs over an existing archive only hit the network for paths that
+    are missing from the cache or have expired.
+    """
+    conn = _response_cache()
+    row = conn.execute(
+        'SELECT fetched_at, body FROM http_cache WHERE path = ?',
+        (path,)).fetchone()
+    if row is not None and time.time() - row[0] < CACHE_EXPIRE_AFTER:
+        log.debug("cache hit for %s", path)
+        return row[1]
+
+    body = await http_get(session, path)
+    conn.execute(
+        'INSERT OR REPLACE INTO http_cache (path, fetched_at, body) '
+        'VALUES (?, ?, ?)', (path, time.time(), body))
+    conn.commit()
+    return body
+
+
+async def http_get_json_cached(session: aiohttp.ClientSession, path: str) -> dict:
+    try:
+        return _json_loads(await http_get_cached(session, path))
+    except json.JSONDecodeError:
+        log.warning("unable to decode JSON response from %r", path)
+        raise
+
+
+def _make_session() -> aiohttp.ClientSession:
+    """Build the one session (and connection pool) used for an entire run.
+
+    Keeping connections alive between requests means the TCP+TLS handshake
+    is paid once per connection rather than once per request.
+    """
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def http_get(session: aiohttp.ClientSession, path: str) -> str:
     log.debug("HTTP GET %s", path)
     backoff = 3
 
     while True:
         try:
-            with urllib.request.urlopen(f"{args().url}{path}") as f:
-                return f.read().decode()
-        except Exception:
-            time.sleep(backoff)
+            async with session.get(f"{args().url}{path}") as response:
+                if response.status == 429:
+                    # Discourse tells us exactly how long to wait, either in the
+                    # Retry-After header or in the `extras.wait_seconds` field of
+                    # the JSON body, so there's no need to guess with backoff.
+                    try:
+                        body = await response.json()
+                    except (aiohttp.ContentTypeError, json.JSONDecodeError):
+                        body = {}
+                    try:
+                        wait_seconds = int(response.headers.get(
+                            'Retry-After',
+                            body.get('extras', {}).get('wait_seconds', 1)))
+                    except (TypeError, ValueError):
+                        # Retry-After is allowed to be an HTTP-date; treat
+                        # that like an unhinted error and fall through to the
+                        # exponential backoff path below.
+                        response.raise_for_status()
+                    log.debug("rate limited on %s, waiting %ds", path, wait_seconds)
+                    await asyncio.sleep(wait_seconds)
+                    continue
+
+                response.raise_for_status()
+                return await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # Exponential backoff is reserved for 5xx responses and network
+            # errors, where the server gives us no wait hint.
+            await asyncio.sleep(backoff)
             backoff *= 2
-            print(f"{args().url}{path}")
-            print("backoff now set at: " + str(backoff))
+            log.debug("error fetching %s, backoff now set at %d", path, backoff)
 
             if backoff >= 256:
                 log.exception('ratelimit exceeded, or something else wrong?')
                 sys.exit(1)
 
 
-def http_get_json(path) -> dict:
+async def http_get_json(session: aiohttp.ClientSession, path: str) -> dict:
     try:
-        return json.loads(http_get(path))
+        return _json_loads(await http_get(session, path))
     except json.JSONDecodeError:
         log.warning("unable to decode JSON response from %r", path)
         raise
 
 
+# Directories already created this run, so each save doesn't re-stat the
+# year-month folder with mkdir(parents=True).
+_created_dirs: set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    if path not in _created_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(path)
+
+
 class PostSlug:
     @classmethod
     def id_from_filename(cls, name: str) -> int:
-        return int(name.split('-', 1)[0])
+        # The post id precedes the first separator in both the current
+        # '='-separated scheme and legacy dash-separated filenames.
+        return int(name.split('=', 1)[0].split('-', 1)[0])
 
 
 @dataclass(frozen=True)
@@ -95,31 +224,43 @@ class Post:
     id: int
     slug: str
     raw: dict
+    created_at: datetime.datetime = field(init=False)
+
+    def __post_init__(self):
+        # Parse the ISO timestamp once; the frozen dataclass means going
+        # through object.__setattr__.
+        object.__setattr__(
+            self, 'created_at',
+            datetime.datetime.fromisoformat(self.raw['created_at']))
 
     def get_created_at(self) -> datetime.datetime:
-        return datetime.datetime.fromisoformat(self.raw['created_at'])
+        return self.created_at
 
     def save(self, dir: Path):
         """Write the raw post to disk."""
         idstr = str(self.id).zfill(10)
         username = self.raw['username'][:10]  # Truncate username if too long
         topic_slug = self.raw['topic_slug'][:50]  # Truncate topic slug if too long
-        filename = f"{idstr}-{username}-{topic_slug}.json"
-        
+        # Encode the topic id in the filename so collect_ids can recover it
+        # without opening the file. '=' cannot appear in Discourse usernames
+        # or slugs, so the fields parse back unambiguously and legacy
+        # all-dash filenames can never be mistaken for this scheme.
+        filename = f"{idstr}=t{self.raw['topic_id']}={username}={topic_slug}.json"
+
         # Ensure the filename length does not exceed a safe limit (e.g., 100 characters)
         max_filename_length = 100
         if len(filename) > max_filename_length:
             # Truncate filename to max length minus extension length
             filename = filename[:max_filename_length - 5] + '.json'
-        
+
         folder_name = self.get_created_at().strftime('%Y-%m-%B')
         full_path = dir / folder_name / filename
-        
+
         # Ensure the directory exists before trying to write the file
-        full_path.parent.mkdir(parents=True, exist_ok=True)
-        
+        _ensure_dir(full_path.parent)
+
         log.info("saving post %s to %s", self.id, full_path)
-        full_path.write_text(json.dumps(self.raw, indent=2))
+        full_path.write_bytes(_json_dumps(self.raw))
 
     def get_topic(self) -> PostTopic:
         return PostTopic(
@@ -143,10 +284,18 @@ class Topic:
     slug: str
     raw: dict
     markdown: str
+    created_at: datetime.datetime = field(init=False)
+
+    def __post_init__(self):
+        # Parse the ISO timestamp once; the frozen dataclass means going
+        # through object.__setattr__.
+        object.__setattr__(
+            self, 'created_at',
+            datetime.datetime.fromisoformat(self.raw['created_at']))
 
     def get_created_at(self) -> datetime.datetime:
-        return datetime.datetime.fromisoformat(self.raw['created_at'])
-    
+        return self.created_at
+
     def save_rendered(self, dir):
         """Write the rendered (.md) topic to disk."""
         dir = Path(dir)  # Ensure dir is a Path object
@@ -154,44 +303,27 @@ class Topic:
         slug_truncated = self.slug[:50]  # Truncate the slug if too long
         idstr = str(self.id).zfill(10)
         filename = f"{date}-{slug_truncated}-id{idstr}.md"
-        
+
         # Ensure the filename length does not exceed a safe limit (e.g., 150 characters)
         max_filename_length = 150
         if len(filename) > max_filename_length:
             filename = filename[:max_filename_length - 3] + '.md'
-        
+
         folder_name = self.get_created_at().strftime('%Y-%m-%B')
         full_path = dir / folder_name / filename  # Construct the path using Path objects
-        full_path.parent.mkdir(parents=True, exist_ok=True)
-        
+        _ensure_dir(full_path.parent)
+
         # Construct the URL to the topic
         base_url = "https://discourse.slicer.org/"
         topic_url = f"{base_url}/t/{self.slug}/{self.id}"
-        
+
         # Append the URL to the markdown content
         markdown = f"# {self.raw['title']}\n\n{self.markdown}\n\n[Link to the original post]({topic_url})"
-        
-        log.info("saving topic markdown %s to %s", self.id, full_path)
-        full_path.write_text(markdown, encoding='utf-8')
-
-    # def save_rendered(self, dir: Path):
-    #     """Write the rendered (.md) topic to disk."""
-    #     date = str(self.get_created_at().date())
-    #     filename = f"{date}-{self.slug}-id{self.id}.md"
-    #     folder_name = self.get_created_at().strftime('%Y-%m-%B')
-    #     full_path = Path(os.path.join(dir, folder_name, filename))
-    #     full_path.parent.mkdir(parents=True, exist_ok=True)
-        
-    #     # Construct the URL to the topic
-    #     base_url = "https://discourse.slicer.org/"
-    #     topic_url = f"{base_url}/t/{self.slug}/{self.id}"
-
-    #     # Append the URL to the markdown content
-    #     markdown = f"# {self.raw['title']}\n\n{self.markdown}\n\n[Link to the original post]({topic_url})"
-        
-    #     log.info("saving topic markdown %s to %s", self.id, full_path)
-    #     full_path.write_text(markdown)
 
+        log.info("saving topic markdown %s to %s", self.id, full_path)
+        # Encode once and write through a large buffer to keep syscalls down.
+        with open(full_path, 'wb', buffering=1 << 20) as f:
+            f.write(markdown.encode('utf-8'))
 
     def get_topic(self) -> PostTopic:
         return PostTopic(
@@ -210,7 +342,64 @@ class Topic:
         )
 
 
-def main() -> None:
+async def fetch_topic(
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        topic_id: int,
+        topic_slug: str,
+        topics_dir: Path,
+        use_cache: bool = True) -> None:
+    """Fetch one topic's JSON and raw markdown pages, then save it rendered.
+
+    Disk writes are handed off to the default executor so they don't block
+    the event loop. Callers that fetch a topic *because it changed* must
+    pass use_cache=False, or they would re-render from stale cached bodies.
+    """
+    get = http_get_cached if use_cache else http_get
+    get_json = http_get_json_cached if use_cache else http_get_json
+
+    async with semaphore:
+        data = await get_json(session, f"/t/{topic_slug}/{topic_id}.json")
+        body = await get(session, f"/raw/{topic_id}")
+
+        if not body:
+            log.warning("could not retrieve topic %d markdown", topic_id)
+            return
+
+        # The paginated raw pages are independent, so fetch a few ahead
+        # concurrently. Accumulating parts in a list and joining once avoids
+        # the O(N^2) cost of repeated `body += ...` growth.
+        parts = [body]
+        page_num = 2
+        while True:
+            pages = await asyncio.gather(*(
+                get(session, f"/raw/{topic_id}?page={page}")
+                for page in range(page_num, page_num + PAGE_PREFETCH)))
+            exhausted = False
+            for page_body in pages:
+                if not page_body:
+                    exhausted = True
+                    break
+                parts.append(page_body)
+            if exhausted:
+                break
+            page_num += PAGE_PREFETCH
+        body = "\n".join(parts)
+
+        t = Topic.from_json(data, body)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, t.save_rendered, topics_dir)
+        log.info("saved topic %s (%s)", t.id, t.slug)
+
+
+def _write_metadata(metadata_file: Path, metadata: dict) -> None:
+    """Atomically persist sync metadata so a crash can't leave it torn."""
+    tmp = metadata_file.with_suffix('.tmp')
+    tmp.write_bytes(_json_dumps(metadata))
+    tmp.replace(metadata_file)
+
+
+async def main_async() -> None:
     """
     Sync posts back to `metdata[last_sync_date] - 1 day`, and then save the rendered
     version of all topics associated with those posts.
@@ -226,8 +415,11 @@ def main() -> None:
     metadata = {}
 
     if metadata_file.exists():
-        metadata = json.loads(metadata_file.read_text())
-        last_sync_date = datetime.datetime.fromisoformat(metadata['last_sync_date'])
+        metadata = _json_loads(metadata_file.read_bytes())
+        # A first-ever run interrupted mid-scan leaves only resume_before_id
+        # behind, so last_sync_date may legitimately be absent.
+        if metadata.get('last_sync_date') is not None:
+            last_sync_date = datetime.datetime.fromisoformat(metadata['last_sync_date'])
 
     if last_sync_date:
         # Resync over the last day to catch any post edits.
@@ -240,169 +432,233 @@ def main() -> None:
     last_created_at: datetime.datetime | None = None
     last_id: int | None = None
 
-    posts = http_get_json('/posts.json')['latest_posts']
-    no_new_posts = False
-
-    while posts:
-        log.info("processing %d posts", len(posts))
-        for json_post in posts:
-            try:
-                post = Post.from_json(json_post)
-            except Exception:
-                log.warning("failed to deserialize post %s", json_post)
-                raise
-            last_created_at = post.get_created_at()
-
-            if last_sync_date is not None:
-                no_new_posts = last_created_at < last_sync_date
-                if no_new_posts:
-                    break
-
-            post.save(posts_dir)
-
-            if not max_created_at:
-                # Set in this way because the first /post.json result returned will be
-                # the latest created_at.
-                max_created_at = post.get_created_at()
-
-            last_id = post.id
-            topic = post.get_topic()
-            topics_to_get[topic.id] = topic
-
-        if no_new_posts or last_id is not None and last_id <= 1:
-            log.info("no new posts, stopping")
-            break
-
-        time.sleep(5)
-        posts = http_get_json(
-            f'/posts.json?before={last_id - 1}')['latest_posts']
-
-        # Discourse implicitly limits the posts query for IDs between `before` and
-        # `before - 50`, so if we don't get any results we have to kind of scan.
-        while not posts and last_id >= 0:
-            # This is probably off-by-one, but doesn't hurt to be safe.
-            last_id -= 49
-            posts = http_get_json(
-                f'/posts.json?before={last_id}')['latest_posts']
-            time.sleep(1)
-
-    if max_created_at is not None:
-        metadata['last_sync_date'] = max_created_at.isoformat()
-        log.info("writing metadata: %s", metadata)
-        metadata_file.write_text(json.dumps(metadata, indent=2))
-
-    time.sleep(3)
-
-    for topic in topics_to_get.values():
-        data = http_get_json(f"/t/{topic.id}.json")
-        body = http_get(f"/raw/{topic.id}")
-        page_num = 2
-
-        if not body:
-            log.warning("could not retrieve topic %d markdown", topic.id)
-            continue
-
-        while (more_body := http_get(f"/raw/{topic.id}?page={page_num}")):
-            body += f"\n{more_body}"
-
-        t = Topic.from_json(data, body)
-        t.save_rendered(topics_dir)
-        log.info("saved topic %s (%s)", t.id, t.slug)
-
-        time.sleep(0.3)
-
-
-def collect_ids(directory):
-    topics_list = []
-    # Collect all json file paths first to establish tqdm progress bar
-    json_files = [
-        os.path.join(root, file)
-        for root, dirs, files in os.walk(directory)
-        for file in files if file.endswith('.json')
-    ]
-
-    # Process each file, displaying progress with tqdm
-    for file_path in tqdm(json_files, desc="Processing JSON files"):
-        with open(file_path, 'r') as json_file:
-            data = json.load(json_file)
-            topics_list.append((data['topic_id'], data['topic_slug']))
-    return np.array(topics_list)
+    async with _make_session() as session:
+        resume_before_id = metadata.get('resume_before_id')
+        if resume_before_id is not None:
+            # A previous run was interrupted mid-scan; continue paging from
+            # its cursor rather than restarting at the newest post.
+            log.info("resuming interrupted scan before post id %s", resume_before_id)
+            posts = (await http_get_json(
+                session, f'/posts.json?before={resume_before_id}'))['latest_posts']
+        else:
+            posts = (await http_get_json(session, '/posts.json'))['latest_posts']
+        no_new_posts = False
+
+        while posts:
+            log.info("processing %d posts", len(posts))
+            for json_post in posts:
+                try:
+                    post = Post.from_json(json_post)
+                except Exception:
+                    log.warning("failed to deserialize post %s", json_post)
+                    raise
+                last_created_at = post.get_created_at()
+
+                if last_sync_date is not None:
+                    no_new_posts = last_created_at < last_sync_date
+                    if no_new_posts:
+                        break
+
+                post.save(posts_dir)
+
+                if not max_created_at:
+                    # Set in this way because the first /post.json result returned will be
+                    # the latest created_at.
+                    max_created_at = post.get_created_at()
+
+                last_id = post.id
+                topic = post.get_topic()
+                topics_to_get[topic.id] = topic
+
+            if last_id is not None:
+                # Checkpoint a resume cursor after every page so an
+                # interrupted scan picks up its backward walk where it
+                # stopped. last_sync_date is only promoted once the walk
+                # completes, since it reflects the newest post and would
+                # otherwise mask pages the scan never reached.
+                metadata['resume_before_id'] = last_id
+                _write_metadata(metadata_file, metadata)
+
+            if no_new_posts or last_id is not None and last_id <= 1:
+                log.info("no new posts, stopping")
+                break
+
+            await asyncio.sleep(5)
+            posts = (await http_get_json(
+                session, f'/posts.json?before={last_id - 1}'))['latest_posts']
+
+            # Discourse implicitly limits the posts query for IDs between `before` and
+            # `before - 50`, so if we don't get any results we have to scan. Probe
+            # several windows at once and take the first (highest) one with results,
+            # which fills a gap in one round trip instead of one request per window.
+            while not posts and last_id >= 0:
+                probes = await asyncio.gather(*(
+                    http_get_json(session, f'/posts.json?before={last_id - 49 * i}')
+                    for i in range(1, PROBE_WINDOWS + 1)))
+                for i, probe in enumerate(probes, start=1):
+                    if probe['latest_posts']:
+                        # This is probably off-by-one, but doesn't hurt to be safe.
+                        last_id -= 49 * i
+                        posts = probe['latest_posts']
+                        break
+                else:
+                    last_id -= 49 * PROBE_WINDOWS
+                await asyncio.sleep(1)
+
+        # The walk finished, so the cursor is no longer needed and
+        # last_sync_date can safely move forward.
+        had_cursor = metadata.pop('resume_before_id', None) is not None
+        if max_created_at is not None:
+            metadata['last_sync_date'] = max_created_at.isoformat()
+        if max_created_at is not None or had_cursor:
+            log.info("writing metadata: %s", metadata)
+            _write_metadata(metadata_file, metadata)
+
+        semaphore = asyncio.Semaphore(CONCURRENT_REQUESTS)
+        # These topics are being fetched precisely because they received new
+        # posts, so bypass the disk cache to avoid rendering stale bodies.
+        tasks = [
+            fetch_topic(session, semaphore, topic.id, topic.slug, topics_dir,
+                        use_cache=False)
+            for topic in topics_to_get.values()
+        ]
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+def _read_topic_fields(file_path) -> tuple[int, str]:
+    with open(file_path, 'rb') as json_file:
+        raw = json_file.read()
+    data = _json_loads(raw)
+    return int(data['topic_id']), str(data['topic_slug'])
+
+
+def _topic_fields_from_filename(name: str) -> tuple[int, str] | None:
+    """Recover `(topic_id, topic_slug)` from a `{id}=t{topic_id}={user}={slug}.json`
+    filename, or None for files saved before the topic id was encoded.
+
+    Legacy filenames only contain dashes, which usernames and slugs may also
+    contain; the '=' separators make the new scheme unambiguous.
+    """
+    parts = name[:-len('.json')].split('=')
+    if len(parts) != 4 or not parts[1].startswith('t') or not parts[1][1:].isdigit():
+        return None
+    return int(parts[1][1:]), parts[3]
+
+
+def collect_ids(directory) -> tuple[list[int], list[str]]:
+    # Since Post.save encodes the topic id and slug in the filename, scanning
+    # the archive is a pure directory walk with zero payload reads. Files from
+    # before the filename change are parsed the old way on a thread pool.
+    topic_ids: list[int] = []
+    topic_slugs: list[str] = []
+    legacy_files: list[str] = []
+
+    # os.walk yielded nothing for a missing directory; keep that behavior.
+    stack = [directory] if os.path.isdir(directory) else []
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.endswith('.json'):
+                    fields = _topic_fields_from_filename(entry.name)
+                    if fields is None:
+                        legacy_files.append(entry.path)
+                    else:
+                        topic_ids.append(fields[0])
+                        topic_slugs.append(fields[1])
+
+    if legacy_files:
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            for topic_id, topic_slug in tqdm(
+                    executor.map(_read_topic_fields, legacy_files),
+                    total=len(legacy_files), desc="Processing legacy JSON files"):
+                topic_ids.append(topic_id)
+                topic_slugs.append(topic_slug)
+    return topic_ids, topic_slugs
+
+
+def migrate_post_filenames(directory) -> None:
+    """One-time migration of existing posts to the `=t{topic_id}=` filename
+    scheme; run with `--migrate-filenames`.
+
+    Reads each legacy file once and re-saves it through Post.save so the
+    naming logic lives in one place; already-migrated files are untouched.
+    """
+    directory = Path(directory)
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if not file.endswith('.json'):
+                continue
+            if _topic_fields_from_filename(file) is not None:
+                continue
+            file_path = Path(root) / file
+            post = Post.from_json(_json_loads(file_path.read_bytes()))
+            post.save(directory)
+            file_path.unlink()
 
 
-def renderFromJSONs() -> None:
+async def renderFromJSONs() -> None:
 
     directory = r'C:\repos\chat-langchain\_scripts\archive\posts'
     topics_dir = r'C:\repos\chat-langchain\_scripts\archive\rendered-topics'
-    # topics_array = collect_ids(directory)
+    # topic_ids, topic_slugs = collect_ids(directory)
+    # topics_array = np.array([topic_ids, topic_slugs]).T
     # print(topics_array)
 
     # np.save(r'C:\repos\chat-langchain\_scripts\topics_array.npy', topics_array)
 
     data = np.load(r'C:\repos\chat-langchain\_scripts\topics_array.npy')
 
-    # Convert list of lists to list of tuples to make them hashable
-    data_tuples = [tuple(item) for item in data]
-
-    # Use a set to remove duplicates
-    unique_data_tuples = set(data_tuples)
-
-    # Convert back to list of lists if necessary
-    unique_data = [list(item) for item in unique_data_tuples]
-
+    # Deduplicate rows directly in numpy instead of round-tripping the array
+    # through tuples, a set, and back to lists.
+    unique_data = np.unique(data, axis=0)
 
     # establish which IDs have already been extracted
     id_list = []
 
-    # Walk through the directory
-    for root, dirs, files in os.walk(topics_dir):
-        for file in files:
-            # Check if the file is a Markdown file
-            if file.endswith(".md"):
-                # Use regex to find the pattern "-id" followed by numbers
-                match = re.search(r'-id(\d+)\.md', file)
-                if match:
-                    file_id = match.group(1)  # Extract the ID using the regex match
-                    print(file_id)  # Print the extracted ID
-                    id_list.append(int(file_id))  # Convert ID to integer and append to list
-
-    # Convert the list of IDs to a numpy array
-    id_array = np.array(id_list)
-
-    # print(id_array)
-
-    # print(unique_data)
-
-    # filtered_tuples = []
-
-    # for id, topic_slug in tqdm(filtered_tuples):
-    #     pass
-        
-
-    # Filter the list to exclude tuples where ID_INTEGER is in id_array
-    filtered_tuples = [t for t in unique_data  if int(t[0]) not in id_array]
+    # Scan the rendered-topics tree with os.scandir; filenames end in
+    # -id{N}.md, so the ID comes straight out of the name without a regex
+    # (or a per-file print, which flushes the terminal on every file).
+    # The tree may not exist yet on a fresh archive; os.walk yielded
+    # nothing in that case, so keep that behavior.
+    stack = [topics_dir] if os.path.isdir(topics_dir) else []
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.endswith('.md'):
+                    id_str = entry.name[:-3].rpartition('-id')[2]
+                    if id_str.isdigit():
+                        id_list.append(int(id_str))
+
+    # Convert the list of IDs to a numpy array in one pass
+    id_array = np.fromiter(id_list, dtype=np.int64, count=len(id_list))
+
+    # Filter the list to exclude tuples where ID_INTEGER is already extracted.
+    # Membership tests against the numpy array would be a linear scan per
+    # tuple; a set makes this O(1) per lookup.
+    existing_ids = set(id_list)
+    filtered_tuples = [t for t in unique_data if int(t[0]) not in existing_ids]
 
     print("Original number of topics: " + str(len(unique_data)) )
     print("Number of existing files: " + str(len(id_array )) )
     print("Remaining topics to scrap: " + str(len(filtered_tuples)) )
 
-    for id, topic_slug in tqdm(filtered_tuples):
-        data = http_get_json(f"/t/{topic_slug}/{id}.json")
-        body = http_get(f"/raw/{id}")
-        page_num = 2
-
-        if not body:
-            log.warning("could not retrieve topic %d markdown", id)
-            continue
-
-        while (more_body := http_get(f"/raw/{id}?page={page_num}")):
-            body += f"\n{more_body}"
-
-        t = Topic.from_json(data, body)
-        t.save_rendered(topics_dir)
-        log.info("saved topic %s (%s)", t.id, t.slug)
-
-        time.sleep(2)
+    async with _make_session() as session:
+        semaphore = asyncio.Semaphore(CONCURRENT_REQUESTS)
+        tasks = [
+            fetch_topic(session, semaphore, int(id), topic_slug, topics_dir)
+            for id, topic_slug in filtered_tuples
+        ]
+        for task in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
+            await task
 
 
 if __name__ == "__main__":
-    renderFromJSONs()
+    if args().migrate_filenames:
+        migrate_post_filenames(Path(args().target_dir) / 'posts')
+    else:
+        asyncio.run(renderFromJSONs())
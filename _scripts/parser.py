@@ -3,6 +3,10 @@ from typing import Generator
 
 from bs4 import BeautifulSoup, Doctype, NavigableString, Tag
 
+# Precompiled once; these run per code block and per document.
+_LANGUAGE_RE = re.compile(r"language-\w+")
+_NEWLINES_RE = re.compile(r"\n\n+")
+
 
 def langchain_docs_extractor(soup: BeautifulSoup) -> str:
     # Remove all the tags that are not meaningful for the extraction.
@@ -35,7 +39,7 @@ def langchain_docs_extractor(soup: BeautifulSoup) -> str:
                         classes = parent.attrs.get("class", "")
 
                         language = next(
-                            filter(lambda x: re.match(r"language-\w+", x), classes),
+                            filter(_LANGUAGE_RE.match, classes),
                             None,
                         )
                         if language is None:
@@ -107,4 +111,4 @@ def langchain_docs_extractor(soup: BeautifulSoup) -> str:
                     yield from get_text(child)
 
     joined = "".join(get_text(soup))
-    return re.sub(r"\n\n+", "\n\n", joined).strip()
+    return _NEWLINES_RE.sub("\n\n", joined).strip()
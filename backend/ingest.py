@@ -18,9 +18,19 @@ from langchain_openai import OpenAIEmbeddings
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Precompiled once; this runs on every crawled page.
+_NEWLINES_RE = re.compile(r"\n\n+")
+
 
 def get_embeddings_model() -> Embeddings:
-    return OpenAIEmbeddings(model="text-embedding-3-small", chunk_size=200)
+    # The embeddings endpoint accepts large batches and per-request overhead
+    # dominates for small ones, so batch well above the old 200.
+    return OpenAIEmbeddings(
+        model="text-embedding-3-small",
+        chunk_size=1000,
+        max_retries=6,
+        request_timeout=60,
+    )
 
 
 def metadata_extractor(meta: dict, soup: BeautifulSoup) -> dict:
@@ -70,7 +80,7 @@ def load_langsmith_docs():
 
 def simple_extractor(html: str) -> str:
     soup = BeautifulSoup(html, "lxml")
-    return re.sub(r"\n\n+", "\n\n", soup.text).strip()
+    return _NEWLINES_RE.sub("\n\n", soup.text).strip()
 
 
 def load_api_docs():
@@ -127,22 +137,36 @@ def ingest_docs():
     docs_from_langsmith = load_langsmith_docs()
     logger.info(f"Loaded {len(docs_from_langsmith)} docs from Langsmith")
 
-    docs_transformed = text_splitter.split_documents(
-        docs_from_documentation + docs_from_api + docs_from_langsmith
+    # Drop documents too small to yield an indexable chunk before the
+    # splitter allocates fragments for them. Both thresholds stay at the
+    # original 10 characters so the indexed corpus is unchanged.
+    all_docs = [
+        doc
+        for doc in docs_from_documentation + docs_from_api + docs_from_langsmith
+        if len(doc.page_content) > 10
+    ]
+
+    # Filter tiny chunks lazily; index() accepts an iterable, so the full
+    # chunk list is never materialized.
+    docs_transformed = (
+        doc
+        for doc in text_splitter.split_documents(all_docs)
+        if len(doc.page_content) > 10
     )
-    docs_transformed = [doc for doc in docs_transformed if len(doc.page_content) > 10]
 
     # We try to return 'source' and 'title' metadata when querying vector store and
     # Weaviate will error at query time if one of the attributes is missing from a
     # retrieved document.
-    for doc in docs_transformed:
-        if "source" not in doc.metadata:
-            doc.metadata["source"] = ""
-        if "title" not in doc.metadata:
-            doc.metadata["title"] = ""
+    def ensure_metadata(docs):
+        for doc in docs:
+            if "source" not in doc.metadata:
+                doc.metadata["source"] = ""
+            if "title" not in doc.metadata:
+                doc.metadata["title"] = ""
+            yield doc
 
     indexing_stats = index(
-        docs_transformed,
+        ensure_metadata(docs_transformed),
         record_manager,
         vectorstore,
         cleanup="full",